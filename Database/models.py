@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, LargeBinary, Float, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -26,18 +26,42 @@ class Prediction(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey('app_users.id'), nullable=True)
 
     model_name = Column(String, nullable=True)
-    input_data = Column(Text, nullable=True)
+    document_id = Column(String(64), ForeignKey('documents.id'), nullable=True, index=True)
     output_data = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("AppUser", back_populates="predictions")
+    document = relationship("Document")
+
+
+class Document(Base):
+    __tablename__ = 'documents'
+
+    # SHA-256 hex digest of the normalized input text, so repeated texts share a row
+    id = Column(String(64), primary_key=True)
+    # zlib-compressed UTF-8 text
+    body = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
 
 class Feedback(Base):
     __tablename__ = 'feedbacks'
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey('app_users.id'), nullable=False)
+    prediction_id = Column(UUID(as_uuid=True), ForeignKey('predictions.id'), nullable=True)
+    is_correct = Column(Boolean, nullable=True)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("AppUser")
+
+
+class PredictionRescore(Base):
+    __tablename__ = 'prediction_rescores'
+
+    # One row per stored prediction and re-scoring model (see api/rescore.py)
+    prediction_id = Column(UUID(as_uuid=True), ForeignKey('predictions.id'), primary_key=True)
+    model_name = Column(String, primary_key=True)
+    label = Column(String, nullable=False)
+    score = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
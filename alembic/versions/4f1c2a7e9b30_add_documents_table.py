@@ -0,0 +1,111 @@
+"""Add documents table and move prediction input_data into it
+
+Revision ID: 4f1c2a7e9b30
+Revises: dad58b654672
+Create Date: 2026-10-18 10:12:41.208517
+
+"""
+from typing import Sequence, Union
+import hashlib
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f1c2a7e9b30'
+down_revision: Union[str, None] = 'dad58b654672'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows processed per backfill round trip; keeps memory bounded on large tables.
+BATCH_SIZE = 1000
+
+predictions = sa.table(
+    'predictions',
+    sa.column('id', sa.UUID()),
+    sa.column('input_data', sa.Text()),
+    sa.column('document_id', sa.String(64)),
+)
+documents = sa.table(
+    'documents',
+    sa.column('id', sa.String(64)),
+    sa.column('body', sa.LargeBinary()),
+)
+
+
+def _iter_batches(conn, query, key):
+    """Yield successive batches of `query`, paging by `key` (keyset pagination)."""
+    last = None
+    while True:
+        page = query.order_by(key).limit(BATCH_SIZE)
+        if last is not None:
+            page = page.where(key > last)
+        rows = conn.execute(page).fetchall()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('documents',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('body', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('predictions', sa.Column('document_id', sa.String(length=64), nullable=True))
+    op.create_foreign_key('fk_predictions_document_id', 'predictions', 'documents', ['document_id'], ['id'])
+    op.create_index(op.f('ix_predictions_document_id'), 'predictions', ['document_id'], unique=False)
+
+    # Backfill: hash and compress each stored input_data, one chunk at a time.
+    conn = op.get_bind()
+    query = sa.select(predictions.c.id, predictions.c.input_data).where(predictions.c.input_data.isnot(None))
+    for rows in _iter_batches(conn, query, predictions.c.id):
+        bodies = {}
+        links = []
+        for prediction_id, text in rows:
+            data = text.encode('utf-8')
+            doc_id = hashlib.sha256(data).hexdigest()
+            bodies[doc_id] = zlib.compress(data)
+            links.append({'prediction_id': prediction_id, 'doc_id': doc_id})
+        conn.execute(
+            postgresql.insert(documents)
+            .values([{'id': k, 'body': v} for k, v in bodies.items()])
+            .on_conflict_do_nothing(index_elements=['id'])
+        )
+        conn.execute(
+            predictions.update()
+            .where(predictions.c.id == sa.bindparam('prediction_id'))
+            .values(document_id=sa.bindparam('doc_id')),
+            links,
+        )
+
+    op.drop_column('predictions', 'input_data')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('predictions', sa.Column('input_data', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    query = (
+        sa.select(predictions.c.id, documents.c.body)
+        .select_from(predictions.join(documents, predictions.c.document_id == documents.c.id))
+    )
+    for rows in _iter_batches(conn, query, predictions.c.id):
+        conn.execute(
+            predictions.update()
+            .where(predictions.c.id == sa.bindparam('prediction_id'))
+            .values(input_data=sa.bindparam('text')),
+            [{'prediction_id': pid, 'text': zlib.decompress(body).decode('utf-8')} for pid, body in rows],
+        )
+
+    op.drop_index(op.f('ix_predictions_document_id'), table_name='predictions')
+    op.drop_constraint('fk_predictions_document_id', 'predictions', type_='foreignkey')
+    op.drop_column('predictions', 'document_id')
+    op.drop_table('documents')
@@ -0,0 +1,36 @@
+"""Add prediction_rescores table
+
+Revision ID: b7d93e15c6a2
+Revises: 4f1c2a7e9b30
+Create Date: 2026-10-18 14:03:27.551904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d93e15c6a2'
+down_revision: Union[str, None] = '4f1c2a7e9b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('prediction_rescores',
+    sa.Column('prediction_id', sa.UUID(), nullable=False),
+    sa.Column('model_name', sa.String(), nullable=False),
+    sa.Column('label', sa.String(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['prediction_id'], ['predictions.id'], ),
+    sa.PrimaryKeyConstraint('prediction_id', 'model_name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('prediction_rescores')
@@ -0,0 +1,44 @@
+"""Add prediction_id and is_correct to feedbacks
+
+Revision ID: f702b67d7b3b
+Revises: b7d93e15c6a2
+Create Date: 2026-10-18 23:41:09.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f702b67d7b3b'
+down_revision: Union[str, None] = 'b7d93e15c6a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Postgres' default name, which is also what Supabase gives a foreign key added by hand.
+FK_NAME = 'feedbacks_prediction_id_fkey'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Databases managed through Supabase may already have these columns; only add what is missing.
+    inspector = sa.inspect(op.get_bind())
+    columns = {c['name'] for c in inspector.get_columns('feedbacks')}
+    if 'prediction_id' not in columns:
+        op.add_column('feedbacks', sa.Column('prediction_id', sa.UUID(), nullable=True))
+    if 'is_correct' not in columns:
+        op.add_column('feedbacks', sa.Column('is_correct', sa.Boolean(), nullable=True))
+    foreign_keys = inspector.get_foreign_keys('feedbacks')
+    if not any(fk['constrained_columns'] == ['prediction_id'] for fk in foreign_keys):
+        op.create_foreign_key(FK_NAME, 'feedbacks', 'predictions', ['prediction_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys('feedbacks'):
+        if fk['constrained_columns'] == ['prediction_id']:
+            op.drop_constraint(fk['name'], 'feedbacks', type_='foreignkey')
+    op.drop_column('feedbacks', 'is_correct')
+    op.drop_column('feedbacks', 'prediction_id')
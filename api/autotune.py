@@ -0,0 +1,208 @@
+# --- autotune.py ---
+"""Sweep CPU inference settings and write the best one as the startup profile.
+
+Usage (from the project root):
+    python -m api.autotune [--threads 1,2,4] [--interop 1,2] [--batch-sizes 1,4,8,16]
+        [--workers 1,2,4] [--max-p95-ms 500] [--profile inference_profile.json]
+        [--report autotune_report.json]
+
+Each configuration runs in fresh processes (torch only accepts the inter-op
+thread count once per process); `workers` processes run side by side, the way
+uvicorn workers share the box. The workload is synthetic text whose token
+lengths follow a log-normal distribution capped at the model window.
+
+The API scores one text per forward pass, so its settings come from the
+batch size 1 results only: the highest-throughput point on their throughput /
+p95-latency Pareto frontier that meets --max-p95-ms. The API applies its
+thread counts at startup; start uvicorn with its `workers` value. Larger batch
+sizes are only used by the re-scoring command, which runs as one process: the
+profile's `rescore` section holds the single-worker configuration with the
+highest throughput.
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import queue
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from api.inference import DEFAULT_PROFILE_PATH, MODEL_NAME
+from api.preprocessing import MAX_MODEL_TOKENS
+
+# Word pool for synthetic articles; about 1.3 RoBERTa tokens per word.
+_WORDS = (
+    "the model results study data analysis method research paper network learning "
+    "significant approach performance proposed experiments evaluation quantum system "
+    "however therefore results suggest observed training distribution framework"
+).split()
+
+
+def synthetic_workload(samples: int, mean_tokens: int, seed: int = 0) -> List[str]:
+    """Texts with log-normally distributed lengths, clipped to the model window."""
+    rng = np.random.RandomState(seed)
+    tokens = np.clip(rng.lognormal(np.log(mean_tokens), 0.6, samples), 16, MAX_MODEL_TOKENS)
+    words = (tokens / 1.3).astype(int)
+    return [" ".join(rng.choice(_WORDS, n)) for n in words]
+
+
+def _worker(config: Dict[str, int], model_name: str, texts: List[str], barrier, results,
+            timeout: float) -> None:
+    try:
+        from api.inference import apply_thread_settings, classify_texts, load_classifier
+
+        apply_thread_settings(config)
+        tokenizer, model = load_classifier(model_name)
+        batch_size = config["batch_size"]
+        classify_texts(tokenizer, model, texts[:batch_size], batch_size)  # warm-up
+        barrier.wait(timeout)
+        start = time.perf_counter()
+        latencies = []
+        for i in range(0, len(texts), batch_size):
+            t0 = time.perf_counter()
+            classify_texts(tokenizer, model, texts[i:i + batch_size], batch_size)
+            latencies.append(time.perf_counter() - t0)
+        results.put((start, time.perf_counter(), latencies))
+    except BaseException as e:
+        # Report instead of leaving the parent waiting for a result that never comes
+        results.put(f"{type(e).__name__}: {e}")
+        raise
+
+
+def measure(config: Dict[str, int], model_name: str, texts: List[str], timeout: float) -> Dict[str, Any]:
+    """Throughput (texts/s) and batch latency percentiles (ms) of one configuration.
+
+    A configuration whose workers fail, crash or exceed `timeout` seconds is
+    returned with a `failed` reason instead of measurements.
+    """
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(config["workers"])
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(config, model_name, texts, barrier, results, timeout))
+             for _ in range(config["workers"])]
+    for p in procs:
+        p.start()
+
+    runs, failed = [], None
+    deadline = time.monotonic() + timeout
+    while len(runs) < len(procs) and failed is None:
+        try:
+            run = results.get(timeout=1)
+        except queue.Empty:
+            # A worker killed outright (e.g. by the OOM killer) never reports back
+            crashed = [p.exitcode for p in procs if p.exitcode not in (None, 0)]
+            if crashed:
+                failed = f"worker exited with code {crashed[0]}"
+            elif time.monotonic() > deadline:
+                failed = f"timed out after {timeout:.0f} s"
+            continue
+        if isinstance(run, str):
+            failed = run
+        else:
+            runs.append(run)
+
+    for p in procs:
+        if failed is not None:
+            p.terminate()
+        p.join()
+    if failed is None and any(p.exitcode for p in procs):
+        failed = f"worker exited with code {next(p.exitcode for p in procs if p.exitcode)}"
+    if failed is not None:
+        return {**config, "failed": failed}
+
+    # perf_counter is system-wide on Linux, so start/end times compare across processes
+    elapsed = max(r[1] for r in runs) - min(r[0] for r in runs)
+    latencies = np.concatenate([r[2] for r in runs]) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        **config,
+        "throughput": len(texts) * len(runs) / elapsed,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def pareto_frontier(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Results not beaten on both throughput (higher) and p95 latency (lower)."""
+    throughput = np.array([r["throughput"] for r in results])
+    p95 = np.array([r["p95_ms"] for r in results])
+    no_worse = (throughput[None, :] >= throughput[:, None]) & (p95[None, :] <= p95[:, None])
+    better = (throughput[None, :] > throughput[:, None]) | (p95[None, :] < p95[:, None])
+    dominated = (no_worse & better).any(axis=1)
+    frontier = [r for r, d in zip(results, dominated) if not d]
+    return sorted(frontier, key=lambda r: r["p95_ms"])
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Autotune torch threads, batch size and worker count.")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--threads", type=_int_list, default=[1, 2, 4, 8], help="intra-op thread counts")
+    parser.add_argument("--interop", type=_int_list, default=[1, 2], help="inter-op thread counts")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 4, 8, 16],
+                        help="batch sizes for the rescore command; 1 (the API's) is always measured")
+    parser.add_argument("--workers", type=_int_list, default=[1, 2, 4], help="uvicorn worker counts")
+    parser.add_argument("--samples", type=int, default=64, help="texts per worker and configuration")
+    parser.add_argument("--mean-tokens", type=int, default=300, help="median synthetic text length")
+    parser.add_argument("--max-p95-ms", type=float, default=None, help="p95 latency budget for the profile")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE_PATH)
+    parser.add_argument("--report", default="autotune_report.json")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds allowed per configuration")
+    args = parser.parse_args()
+
+    texts = synthetic_workload(args.samples, args.mean_tokens)
+    # API configurations (one text per pass, several workers), then batch sizes
+    # for the single-process rescore command
+    sweep = [(workers, intra, inter, 1) for workers, intra, inter
+             in itertools.product(args.workers, args.threads, args.interop)]
+    sweep += [(1, intra, inter, batch_size) for intra, inter, batch_size
+              in itertools.product(args.threads, args.interop, args.batch_sizes) if batch_size > 1]
+    results, failures = [], []
+    for workers, intra, inter, batch_size in sweep:
+        if workers * intra > cpus:
+            continue  # oversubscribed; only slows every worker down
+        config = {"workers": workers, "intra_op_threads": intra,
+                  "inter_op_threads": inter, "batch_size": batch_size}
+        result = measure(config, args.model, texts, args.timeout)
+        if "failed" in result:
+            failures.append(result)
+            print(f"{config}: FAILED ({result['failed']})")
+            continue
+        results.append(result)
+        print(f"{config}: {result['throughput']:.1f} texts/s, p95 {result['p95_ms']:.0f} ms")
+    api_results = [r for r in results if r["batch_size"] == 1]
+    if not api_results:
+        parser.error(f"no API configuration fits in {cpus} CPUs or all of them failed")
+
+    frontier = pareto_frontier(api_results)
+    eligible = [r for r in frontier if args.max_p95_ms is None or r["p95_ms"] <= args.max_p95_ms]
+    best = max(eligible or frontier[:1], key=lambda r: r["throughput"])
+    profile = {k: best[k] for k in ("workers", "intra_op_threads", "inter_op_threads")}
+    batch_results = [r for r in results if r["workers"] == 1]
+    if batch_results:
+        batch_best = max(batch_results, key=lambda r: r["throughput"])
+        profile["rescore"] = {k: batch_best[k] for k in ("intra_op_threads", "inter_op_threads", "batch_size")}
+
+    with open(args.profile, "w") as f:
+        json.dump(profile, f, indent=2)
+    with open(args.report, "w") as f:
+        json.dump({"cpus": cpus, "model": args.model, "max_p95_ms": args.max_p95_ms,
+                   "profile": profile, "api_pareto_frontier": frontier, "results": results,
+                   "failed": failures}, f, indent=2)
+    print(f"Profile written to {args.profile}: {profile}")
+    print(f"Start the API with: uvicorn main:app --workers {profile['workers']}")
+
+
+if __name__ == "__main__":
+    main()
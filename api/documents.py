@@ -0,0 +1,49 @@
+# --- documents.py ---
+from typing import Any, Dict, List, Optional
+import hashlib
+import zlib
+
+# Column list for prediction listings that do not need the document body.
+PREDICTION_COLUMNS = "id, user_id, document_id, output_data, created_at, model_name"
+
+
+def document_id(text: str) -> str:
+    """Content address of a normalized input text (SHA-256 hex digest)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def encode_body(text: str) -> str:
+    """Compress text for the `documents.body` bytea column (PostgREST hex format)."""
+    return "\\x" + zlib.compress(text.encode("utf-8")).hex()
+
+
+def decompress_body(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def decode_body(value: str) -> str:
+    """Inverse of encode_body for bodies read back through PostgREST."""
+    return decompress_body(bytes.fromhex(value[2:]))
+
+
+def store_document(client, text: str) -> str:
+    """Insert the text into `documents` unless it is already stored; return its id."""
+    doc_id = document_id(text)
+    client.table("documents").upsert(
+        {"id": doc_id, "body": encode_body(text)},
+        on_conflict="id",
+        ignore_duplicates=True,
+    ).execute()
+    return doc_id
+
+
+def attach_input_data(rows: List[Dict[str, Any]], max_chars: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Replace the embedded `documents(body)` of each row with decoded `input_data`.
+
+    With max_chars, `input_data` is only a preview of that many characters.
+    """
+    for row in rows:
+        document = row.pop("documents", None)
+        text = decode_body(document["body"]) if document else None
+        row["input_data"] = text[:max_chars] if text and max_chars else text
+    return rows
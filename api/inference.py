@@ -0,0 +1,91 @@
+# --- inference.py ---
+from typing import Any, Dict, List, Sequence
+import json
+import os
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from api.preprocessing import MAX_MODEL_TOKENS
+
+MODEL_NAME = "roberta-base-openai-detector"
+# Written by `python -m api.autotune`, applied at startup by the API. Resolved
+# against the project root so the API finds it whatever directory it starts in.
+DEFAULT_PROFILE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'inference_profile.json'))
+
+
+def load_profile(path: str = DEFAULT_PROFILE_PATH) -> Dict[str, Any]:
+    """Tuned inference settings, or an empty dict (torch defaults) if there is no profile."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def apply_thread_settings(profile: Dict[str, Any]) -> None:
+    """Set torch intra-/inter-op thread counts; must run before the first forward pass."""
+    if profile.get("intra_op_threads"):
+        torch.set_num_threads(int(profile["intra_op_threads"]))
+    if profile.get("inter_op_threads"):
+        torch.set_num_interop_threads(int(profile["inter_op_threads"]))
+
+
+def load_classifier(model_name: str = MODEL_NAME):
+    """Load (tokenizer, model) for batch scoring outside the request path."""
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    return tokenizer, model
+
+
+def _top_labels(model, logits) -> List[Dict[str, Any]]:
+    scores = torch.softmax(logits.float(), dim=-1)
+    best = scores.argmax(dim=-1)
+    return [{"label": model.config.id2label[int(i)], "score": scores[row, i].item()}
+            for row, i in enumerate(best)]
+
+
+def classify_encoding(pipe, encoding) -> List[Dict[str, Any]]:
+    """Run the pipeline's model on an already tokenized input.
+
+    Returns the same shape as `pipe(text)`, e.g. [{'label': 'Real', 'score': 0.98}],
+    so stored `output_data` and API responses are unchanged.
+    """
+    inputs = {k: v.to(pipe.device) for k, v in encoding.items()}
+    with torch.no_grad():
+        logits = pipe.model(**inputs).logits
+    return _top_labels(pipe.model, logits)
+
+
+def length_buckets(lengths: Sequence[int], batch_size: int) -> List[np.ndarray]:
+    """Group row indices of similar token length so each batch pads little."""
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def classify_texts(tokenizer, model, texts: Sequence[str], batch_size: int = 16,
+                   executor=None, max_length: int = MAX_MODEL_TOKENS) -> List[Dict[str, Any]]:
+    """Classify many texts with length-bucketed batches; results keep input order.
+
+    Texts are tokenized once, then padded per batch. With an executor, batches
+    run concurrently (torch releases the GIL during the forward pass).
+    """
+    encodings = tokenizer(list(texts), truncation=True, max_length=max_length)
+    input_ids, attention = encodings["input_ids"], encodings["attention_mask"]
+    buckets = length_buckets([len(ids) for ids in input_ids], batch_size)
+
+    def run(rows):
+        batch = tokenizer.pad(
+            {"input_ids": [input_ids[i] for i in rows], "attention_mask": [attention[i] for i in rows]},
+            return_tensors="pt",
+        )
+        with torch.no_grad():
+            return _top_labels(model, model(**batch).logits)
+
+    results: List[Dict[str, Any]] = [None] * len(input_ids)
+    mapper = executor.map if executor is not None else map
+    for rows, predictions in zip(buckets, mapper(run, buckets)):
+        for i, prediction in zip(rows, predictions):
+            results[i] = prediction
+    return results
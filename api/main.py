@@ -3,20 +3,28 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from fastapi import Depends, FastAPI, HTTPException, File, UploadFile
+from fastapi import Depends, FastAPI, HTTPException, File, UploadFile, Request, Query
 import traceback
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from transformers import pipeline
-from pydantic import BaseModel, Field, EmailStr, field_validator
-from typing import Optional, List, Dict, Any
+from typing import List, Dict, Any, Optional
 from uuid import UUID, uuid4
-from datetime import datetime
 import ast
 from supabase import create_client, Client
 from postgrest.exceptions import APIError
 from dotenv import load_dotenv
-import re
+from api.preprocessing import PreparedInput, prepare_input, iter_pdf_pages
+from api.inference import classify_encoding, MODEL_NAME, DEFAULT_PROFILE_PATH, load_profile, apply_thread_settings
+from api.near_duplicates import NearDuplicateIndex
+from api.documents import PREDICTION_COLUMNS, attach_input_data, store_document
+from api.schemas import (
+    AuthRequest, SignInRequest, TokenResponse, AccuracyResponse, PredictionRequest, FeedbackCreate,
+    AppUser, Prediction, PredictionInput, UserAdminView, PredictionAdminView, USER_ADMIN_COLUMNS,
+    parse_output_data, normalize_timestamp,
+)
+from api.responses import fast_json_response
+import threading
 
 # Load environment variables
 load_dotenv()
@@ -53,90 +61,42 @@ if not supabase_url or not supabase_key:
 supabase_client: Client = create_client(supabase_url, supabase_key)
 
 # ML Model Loading
-roberta_pipe = pipeline("text-classification", model="roberta-base-openai-detector")
-
-# --- Utility functions ---
-def clean_text(text: str) -> str:
-    """Normalize whitespace, remove hyphenated line breaks, collapse multiple spaces."""
-    text = text.replace('\n', ' ')
-    text = re.sub(r'-\s+', '', text)  # join words broken with hyphen + newline/space
-    text = re.sub(r'\s+', ' ', text)
-    return text.strip()
-
-# --- Pydantic Models ---
-
-class AuthRequest(BaseModel):
-    email: EmailStr
-    password: str = Field(..., min_length=6)
-    username: Optional[str] = None
-
-class SignInRequest(BaseModel):
-    email: EmailStr
-    password: str
-
-class TokenResponse(BaseModel):
-    access_token: str
-    token_type: str = "bearer"
-    role: str
-
-class AccuracyResponse(BaseModel):
-    accuracy: float
-
-class PredictionRequest(BaseModel):
-    input_text: str
-
-class FeedbackCreate(BaseModel):
-    prediction_id: UUID
-    is_correct: bool
-    comment: Optional[str] = None
-
-class AppUser(BaseModel):
-    id: UUID
-    username: Optional[str] = None
-    email: EmailStr
-    role: str
-    created_at: datetime
-    updated_at: Optional[datetime] = None
-
-# Base class for prediction fields to handle data transformation from DB
-class PredictionBase(BaseModel):
-    id: UUID
-    user_id: UUID
-    input_data: str  # Matches DB column name
-    output_data: Dict[str, Any]
-    created_at: Optional[datetime] = None # Make optional to handle potential nulls from DB
-    model_name: Optional[str] = None
-
-    @field_validator('output_data', mode='before')
-    @classmethod
-    def parse_output_data(cls, v: Any) -> Any:
-        if isinstance(v, str):
-            try:
-                # Safely evaluate the string representation of the list/dict
-                data = ast.literal_eval(v)
-                # The model expects a dict, but pipeline returns a list with one dict
-                if isinstance(data, list) and len(data) > 0:
-                    return data[0]
-                return data
-            except (ValueError, SyntaxError):
-                # Return an empty dict if it's not a valid literal
-                return {}
-        return v
-
-class Prediction(PredictionBase):
-    feedback_is_correct: Optional[bool] = None
-    feedback_created_at: Optional[datetime] = None
-    feedback_comment: Optional[str] = None
-
-class UserAdminView(BaseModel):
-    id: UUID
-    email: EmailStr
-    username: Optional[str]
-    role: str
-    created_at: datetime
-
-class PredictionAdminView(PredictionBase):
-    user_email: Optional[EmailStr] = None
+# Apply torch thread counts tuned by `python -m api.autotune` (uvicorn --workers comes from the same profile)
+inference_profile_path = os.getenv("INFERENCE_PROFILE", DEFAULT_PROFILE_PATH)
+inference_profile = load_profile(inference_profile_path)
+apply_thread_settings(inference_profile)
+if inference_profile:
+    print(f"Inference profile loaded from {inference_profile_path}: {inference_profile}")
+else:
+    print(f"No inference profile at {inference_profile_path}; using torch default thread counts")
+roberta_pipe = pipeline("text-classification", model=MODEL_NAME)
+
+# Near-duplicate index: submissions at least this similar (estimated Jaccard over
+# word shingles) to a stored prediction reuse its result instead of running the model.
+# The index lives in process memory: with `uvicorn --workers N` every worker builds
+# its own copy at startup and only sees predictions inserted through itself since
+# then, so reuse is best-effort and memory use scales with the worker count.
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() == "true"
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.9"))
+near_dup_index = NearDuplicateIndex()
+
+def rebuild_near_dup_index(page_size: int = 1000) -> None:
+    """Index every stored prediction of the current model, paging through the table by id."""
+    last_id = None
+    while True:
+        query = supabase_client.table("predictions").select("id, documents(body)").eq("model_name", MODEL_NAME).order("id").limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.execute().data
+        if not rows:
+            break
+        near_dup_index.add_many((r['id'], r['input_data']) for r in attach_input_data(rows))
+        last_id = rows[-1]['id']
+    print(f"Near-duplicate index ready: {len(near_dup_index)} predictions")
+
+if NEAR_DUP_ENABLED:
+    # Build in the background so the API can serve requests meanwhile
+    threading.Thread(target=rebuild_near_dup_index, daemon=True).start()
 
 # --- Authentication Dependencies ---
 
@@ -200,6 +160,49 @@ def require_admin(current_user: AppUser = Depends(get_current_app_user)):
         raise HTTPException(status_code=403, detail="Administrator access required")
     return current_user
 
+# --- Prediction helpers ---
+
+def predict_and_store(prepared: PreparedInput, current_user: AppUser) -> Dict[str, Any]:
+    """Classify prepared input (or reuse a near-duplicate's result) and save the prediction."""
+    match = near_dup_index.query(prepared.text, NEAR_DUP_THRESHOLD) if NEAR_DUP_ENABLED else None
+    prediction_result = None
+    if match:
+        matched_res = supabase_client.table("predictions").select("user_id, output_data, model_name").eq("id", match[0]).execute()
+        matched = matched_res.data[0] if matched_res.data else None
+        matched_output = parse_output_data(matched['output_data']) if matched else None
+        # Only reuse a well-formed result from the current model; otherwise run the model
+        # (the matched prediction may be deleted, malformed or from an older detector).
+        if matched and matched.get('model_name') == MODEL_NAME and isinstance(matched_output, dict) and matched_output:
+            prediction_result = [matched_output]
+            if matched['user_id'] != str(current_user.id):
+                match = None  # Reuse the output, but never reveal another user's submission
+        else:
+            match = None
+    if prediction_result is None:
+        prediction_result = classify_encoding(roberta_pipe, prepared.encoding)
+
+    # The user always gets their own row, so history and feedback keep working.
+    # Identical texts share one compressed row in `documents`.
+    prediction_data = {
+        "user_id": str(current_user.id),
+        "document_id": store_document(supabase_client, prepared.text),
+        "output_data": str(prediction_result),
+        "model_name": MODEL_NAME
+    }
+    response = supabase_client.table("predictions").insert(prediction_data).execute()
+    if getattr(response, 'error', None):
+        raise HTTPException(status_code=500, detail=f"Failed to save prediction: {response.error.message}")
+
+    # The ID from the response is a UUID string, so we return it directly
+    prediction_id = response.data[0]['id']
+    if NEAR_DUP_ENABLED:
+        near_dup_index.add(prediction_id, prepared.text)
+    result = {"prediction": prediction_result, "id": prediction_id}
+    if match:
+        result["near_duplicate_of"] = match[0]
+        result["similarity"] = match[1]
+    return result
+
 # --- API Endpoints ---
 
 @app.get("/users/me", response_model=AppUser)
@@ -280,34 +283,27 @@ def sign_out_endpoint(credentials: HTTPAuthorizationCredentials = Depends(http_b
 @app.post("/predict")
 async def predict(request: PredictionRequest, current_user: AppUser = Depends(get_current_app_user)):
     try:
-        cleaned = clean_text(request.input_text)
-        capped = cleaned[:5000]
+        # Normalize and tokenize in one pass; the same text is stored as the input document
+        prepared = prepare_input([request.input_text], roberta_pipe.tokenizer)
         # DEBUG: print first 300 chars for comparison
-        print("/predict capped text:", capped[:300])
-        prediction_result = roberta_pipe(capped, truncation=True, max_length=512)
-        
-        prediction_data = {
-            "user_id": str(current_user.id),
-            "input_data": capped,
-            "output_data": str(prediction_result),
-            "model_name": "roberta-base-openai-detector"
-        }
-
-        response = supabase_client.table("predictions").insert(prediction_data).execute()
-
-        if getattr(response, 'error', None):
-            raise HTTPException(status_code=500, detail=f"Failed to save prediction: {response.error.message}")
-
-        # The ID from the response is a UUID string, so we return it directly
-        return {"prediction": prediction_result, "id": response.data[0]['id']}
+        print("/predict capped text:", prepared.text[:300])
+        return predict_and_store(prepared, current_user)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/predictions/me", response_model=List[Prediction])
-async def get_user_predictions(current_user: AppUser = Depends(get_current_app_user)):
+async def get_user_predictions(request: Request, include_input: bool = False,
+                               preview_chars: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1),
+                               current_user: AppUser = Depends(get_current_app_user)):
     try:
-        # Step 1: Fetch all predictions for the current user
-        predictions_response = supabase_client.table("predictions").select("*").eq("user_id", str(current_user.id)).order("created_at", desc=True).execute()
+        # Step 1: Fetch the current user's predictions, newest first, joining the input text
+        # only if the full text (include_input) or a preview (preview_chars) is requested
+        with_input = include_input or preview_chars > 0
+        columns = PREDICTION_COLUMNS + (", documents(body)" if with_input else "")
+        query = supabase_client.table("predictions").select(columns).eq("user_id", str(current_user.id)).order("created_at", desc=True)
+        if limit:
+            query = query.limit(limit)
+        predictions_response = query.execute()
         
         if getattr(predictions_response, 'error', None):
             raise APIError(predictions_response.error.dict())
@@ -315,6 +311,8 @@ async def get_user_predictions(current_user: AppUser = Depends(get_current_app_u
         predictions = predictions_response.data
         if not predictions:
             return []
+        if with_input:
+            attach_input_data(predictions, None if include_input else preview_chars)
 
         prediction_ids = [p['id'] for p in predictions]
 
@@ -328,12 +326,15 @@ async def get_user_predictions(current_user: AppUser = Depends(get_current_app_u
             # Step 3: Create a lookup map (prediction_id -> feedback)
             feedbacks_map = {f['prediction_id']: f for f in feedbacks_response.data}
 
-        # Step 4: Merge feedback data into predictions
+        # Step 4: Merge feedback data into predictions, shaping each row like the Prediction model
         for p in predictions:
+            p['output_data'] = parse_output_data(p['output_data'])
+            p['created_at'] = normalize_timestamp(p.get('created_at'))
+            p.setdefault('input_data', None)
             feedback_info = feedbacks_map.get(p['id'])
             if feedback_info:
                 p['feedback_is_correct'] = feedback_info.get('is_correct')
-                p['feedback_created_at'] = feedback_info.get('created_at')
+                p['feedback_created_at'] = normalize_timestamp(feedback_info.get('created_at'))
                 # Map 'content' from DB to 'feedback_comment' in response model
                 p['feedback_comment'] = feedback_info.get('content')
             else:
@@ -341,7 +342,7 @@ async def get_user_predictions(current_user: AppUser = Depends(get_current_app_u
                 p['feedback_created_at'] = None
                 p['feedback_comment'] = None
         
-        return predictions
+        return fast_json_response(request, predictions)
 
     except APIError as e:
         print(f"APIError in get_user_predictions: {e}")
@@ -351,6 +352,16 @@ async def get_user_predictions(current_user: AppUser = Depends(get_current_app_u
         print(f"Exception in get_user_predictions: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
 
+@app.get("/predictions/{prediction_id}/input", response_model=PredictionInput)
+async def get_prediction_input(prediction_id: UUID, current_user: AppUser = Depends(get_current_app_user)):
+    # Full text of one of the user's predictions, for detail views; list endpoints send previews
+    res = supabase_client.table("predictions").select("id, user_id, documents(body)").eq("id", str(prediction_id)).execute()
+    # Another user's prediction gets the same 404 as a missing one
+    if not res.data or res.data[0]['user_id'] != str(current_user.id):
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    row = attach_input_data(res.data)[0]
+    return PredictionInput(id=row['id'], input_data=row['input_data'])
+
 @app.get("/feedback-count", dependencies=[Depends(require_admin)])
 async def get_feedback_count():
     try:
@@ -475,24 +486,13 @@ async def predict_pdf(file: UploadFile = File(...), current_user: AppUser = Depe
         import PyPDF2, io
         pdf_bytes = await file.read()
         reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
-        extracted_text = " ".join([page.extract_text() or "" for page in reader.pages])
-        if not extracted_text.strip():
+        # Pages are extracted lazily; extraction stops once the text budget is filled
+        prepared = prepare_input(iter_pdf_pages(reader), roberta_pipe.tokenizer)
+        if not prepared.text:
             raise HTTPException(status_code=400, detail="PDF içeriği okunamadı veya boş.")
-        cleaned = clean_text(extracted_text)
-        capped = cleaned[:5000]
         # DEBUG: print first 300 chars for comparison
-        print("/predict-pdf capped text:", capped[:300])
-        prediction_result = roberta_pipe(capped, truncation=True, max_length=512)
-        prediction_data = {
-            "user_id": str(current_user.id),
-            "input_data": capped,
-            "output_data": str(prediction_result),
-            "model_name": "roberta-base-openai-detector"
-        }
-        response = supabase_client.table("predictions").insert(prediction_data).execute()
-        if getattr(response, 'error', None):
-            raise HTTPException(status_code=500, detail=f"Failed to save prediction: {response.error.message}")
-        return {"prediction": prediction_result, "id": response.data[0]['id']}
+        print("/predict-pdf capped text:", prepared.text[:300])
+        return predict_and_store(prepared, current_user)
     except HTTPException:
         raise
     except Exception as e:
@@ -501,24 +501,35 @@ async def predict_pdf(file: UploadFile = File(...), current_user: AppUser = Depe
 # --- Admin Endpoints ---
 
 @app.get("/admin/users", response_model=List[UserAdminView], dependencies=[Depends(require_admin)])
-async def list_users():
+async def list_users(request: Request):
     try:
-        response = supabase_client.table("app_users").select("*").order("created_at", desc=True).execute()
-        return response.data or []
+        response = supabase_client.table("app_users").select(USER_ADMIN_COLUMNS).order("created_at", desc=True).execute()
+        users = response.data or []
+        for user in users:
+            user['created_at'] = normalize_timestamp(user.get('created_at'))
+        return fast_json_response(request, users)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/admin/predictions", response_model=List[PredictionAdminView], dependencies=[Depends(require_admin)])
-async def list_predictions() -> List[PredictionAdminView]:
+async def list_predictions(request: Request, include_input: bool = False,
+                           preview_chars: int = Query(0, ge=0), limit: Optional[int] = Query(None, ge=1)):
     try:
         # Adjust the select query to fetch user email via a foreign key relationship
         # This assumes 'app_users' is the related table and the foreign key is set up.
-        preds_res = supabase_client.table("predictions").select("*, app_users(email)").order("created_at", desc=True).execute()
+        with_input = include_input or preview_chars > 0
+        columns = PREDICTION_COLUMNS + ", app_users(email)" + (", documents(body)" if with_input else "")
+        query = supabase_client.table("predictions").select(columns).order("created_at", desc=True)
+        if limit:
+            query = query.limit(limit)
+        preds_res = query.execute()
 
         if not preds_res.data:
             return []
+        if with_input:
+            attach_input_data(preds_res.data, None if include_input else preview_chars)
 
-        # Process data to flatten the nested user email
+        # Process data to flatten the nested user email and match PredictionAdminView
         processed_data = []
         for pred in preds_res.data:
             if 'app_users' in pred and pred['app_users']:
@@ -526,8 +537,11 @@ async def list_predictions() -> List[PredictionAdminView]:
             else:
                 pred['user_email'] = None # Handle case where user might be deleted
             del pred['app_users'] # Clean up the nested dict
+            pred['output_data'] = parse_output_data(pred['output_data'])
+            pred['created_at'] = normalize_timestamp(pred.get('created_at'))
+            pred.setdefault('input_data', None)
             processed_data.append(pred)
 
-        return [PredictionAdminView(**p) for p in processed_data]
+        return fast_json_response(request, processed_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
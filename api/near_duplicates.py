@@ -0,0 +1,141 @@
+# --- near_duplicates.py ---
+from typing import Iterable, Optional, Tuple
+from uuid import UUID
+import threading
+import zlib
+
+import numpy as np
+
+# Prime just above 2**32; (a * x + b) stays below 2**64 for 32-bit a, b, x.
+_PRIME = np.uint64(4294967311)
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """32-bit hashes of the lower-cased word k-grams of already normalized text."""
+    words = text.lower().split(' ')
+    if len(words) <= shingle_size:
+        grams = [' '.join(words)] if text else []
+    else:
+        grams = [' '.join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index over the normalized `input_data` of stored predictions.
+
+    Signatures, band keys and ids live in preallocated NumPy arrays (under
+    400 bytes per entry with the defaults), so millions of predictions fit in
+    memory. Each band keeps a sorted copy of its keys for binary search plus
+    a short unsorted tail of recent inserts. Once the tail grows, a background
+    thread re-sorts the keys without holding the lock and swaps the result in,
+    so inserts and queries on the request path never wait for a full sort.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 8, shingle_size: int = 5,
+                 seed: int = 1, capacity: int = 1024):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self._a = rng.randint(1, 2**32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2**32, size=num_perm, dtype=np.uint64)
+
+        self._sigs = np.empty((capacity, num_perm), dtype=np.uint32)
+        self._keys = np.empty((capacity, bands), dtype=np.uint32)
+        self._ids = np.empty((capacity, 16), dtype=np.uint8)
+        self._size = 0
+        # Sorted band keys (bands, frozen) and the rows they belong to.
+        self._sorted_keys = np.empty((bands, 0), dtype=np.uint32)
+        self._sorted_rows = np.empty((bands, 0), dtype=np.int32)
+        self._frozen = 0
+        self._freezing = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not hashes.size:
+            return None
+        mixed = (hashes[:, None] * self._a + self._b) % _PRIME
+        return (mixed.min(axis=0) & _MASK32).astype(np.uint32)
+
+    def _band_keys(self, sig: np.ndarray) -> np.ndarray:
+        return np.array([zlib.crc32(sig[i * self.rows:(i + 1) * self.rows].tobytes())
+                         for i in range(self.bands)], dtype=np.uint32)
+
+    def add(self, prediction_id, text: str) -> bool:
+        """Index one prediction; returns False when the text has no shingles."""
+        sig = self.signature(text)
+        if sig is None:
+            return False
+        keys = self._band_keys(sig)
+        with self._lock:
+            if self._size == len(self._sigs):
+                self._grow()
+            n = self._size
+            self._sigs[n] = sig
+            self._keys[n] = keys
+            self._ids[n] = np.frombuffer(UUID(str(prediction_id)).bytes, dtype=np.uint8)
+            self._size = n + 1
+            if not self._freezing and self._size - self._frozen > max(1024, self._frozen // 8):
+                # Rows below _size never change, and _grow copies into a new array,
+                # so the freezer can read this snapshot without the lock.
+                self._freezing = True
+                threading.Thread(target=self._freeze, args=(self._keys, self._size), daemon=True).start()
+        return True
+
+    def add_many(self, rows: Iterable[Tuple[str, str]]) -> int:
+        """Index (prediction_id, input_data) pairs, e.g. when rebuilding from the table."""
+        return sum(1 for prediction_id, text in rows if text and self.add(prediction_id, text))
+
+    def query(self, text: str, threshold: float) -> Optional[Tuple[str, float]]:
+        """Return (prediction_id, estimated Jaccard similarity) of the best match >= threshold."""
+        sig = self.signature(text)
+        if sig is None:
+            return None
+        keys = self._band_keys(sig)
+        with self._lock:
+            n, frozen = self._size, self._frozen
+            if not n:
+                return None
+            candidates = [np.nonzero((self._keys[frozen:n] == keys).any(axis=1))[0] + frozen]
+            for band in range(self.bands):
+                lo = np.searchsorted(self._sorted_keys[band], keys[band], side="left")
+                hi = np.searchsorted(self._sorted_keys[band], keys[band], side="right")
+                candidates.append(self._sorted_rows[band, lo:hi])
+            rows = np.unique(np.concatenate(candidates))
+            if not rows.size:
+                return None
+            similarity = (self._sigs[rows] == sig).mean(axis=1)
+            best = int(similarity.argmax())
+            if similarity[best] < threshold:
+                return None
+            return str(UUID(bytes=self._ids[rows[best]].tobytes())), float(similarity[best])
+
+    def _grow(self) -> None:
+        capacity = len(self._sigs) * 2
+        for name in ("_sigs", "_keys", "_ids"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _freeze(self, keys: np.ndarray, n: int) -> None:
+        """Sort the band keys of the first n rows, then swap them in under the lock."""
+        try:
+            order = np.argsort(keys[:n], axis=0, kind="stable").T
+            sorted_rows = order.astype(np.int32)
+            sorted_keys = np.take_along_axis(keys[:n].T, order, axis=1)
+            with self._lock:
+                self._sorted_rows = sorted_rows
+                self._sorted_keys = sorted_keys
+                self._frozen = n
+        finally:
+            with self._lock:
+                self._freezing = False
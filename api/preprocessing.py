@@ -0,0 +1,138 @@
+# --- preprocessing.py ---
+from typing import Iterable, List, NamedTuple, Any
+import glob
+import os
+import random
+import re
+import sys
+
+# Number of normalized characters stored as `input_data` (and fed to the model).
+MAX_INPUT_CHARS = 5000
+# Token window of roberta-base-openai-detector, special tokens included.
+MAX_MODEL_TOKENS = 512
+# Inputs checked by the regression run below when no files are given.
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "preprocessing_corpus")
+
+
+class PreparedInput(NamedTuple):
+    text: str        # normalized text, identical to clean_text(raw)[:max_chars]
+    encoding: Any    # tokenizer output (input_ids / attention_mask tensors)
+
+
+def clean_text(text: str) -> str:
+    """Normalize whitespace, remove hyphenated line breaks, collapse multiple spaces.
+
+    Reference implementation kept for regression checks; the API uses
+    normalize_chunks, which produces the same output in a single pass.
+    """
+    text = text.replace('\n', ' ')
+    text = re.sub(r'-\s+', '', text)  # join words broken with hyphen + newline/space
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+# One match per step: a whitespace run, the '-' + whitespace runs clean_text
+# drops, then everything up to the next whitespace or dropped '-'.
+_TOKEN = re.compile(r'(\s+)?((?:-\s+)+)?([^\s-]*(?:-(?!\s)[^\s-]*)*)')
+
+
+def normalize_chunks(chunks: Iterable[str], max_chars: int = MAX_INPUT_CHARS) -> str:
+    """Single-pass equivalent of clean_text(''.join(chunks))[:max_chars].
+
+    Chunks are consumed lazily and scanning stops as soon as max_chars
+    characters have been produced, so the cost no longer depends on the
+    size of the whole document (e.g. every page of a long PDF). Each chunk
+    is scanned with a compiled regex, so long runs of whitespace or dropped
+    hyphens cost one match rather than one Python step per character.
+    """
+    out = []
+    length = 0
+    pending_space = False   # whitespace seen after some output, emitted lazily
+    pending_hyphen = False  # '-' ending the previous chunk; dropped if whitespace follows
+    skipping = False        # inside the whitespace run following a dropped '-'
+
+    for chunk in chunks:
+        for m in _TOKEN.finditer(chunk):
+            if m.end() == m.start():
+                continue
+            space, dropped, word = m.groups()
+            lead = ''
+            if pending_hyphen:
+                pending_hyphen = False
+                if space:
+                    skipping = True
+                else:
+                    lead = '-'
+                    skipping = False
+            elif space and not skipping and length:
+                pending_space = True
+            if dropped:
+                skipping = True
+            if word:
+                skipping = False
+                if word[-1] == '-' and m.end() == len(chunk):
+                    # Kept or dropped depending on how the next chunk starts
+                    word = word[:-1]
+                    pending_hyphen = True
+            text = lead + word
+            if text:
+                if pending_space:
+                    out.append(' ')
+                    length += 1
+                    pending_space = False
+                out.append(text)
+                length += len(text)
+                if length >= max_chars:
+                    return ''.join(out)[:max_chars]
+
+    if pending_hyphen:
+        if pending_space:
+            out.append(' ')
+        out.append('-')
+    return ''.join(out)[:max_chars]
+
+
+def prepare_input(chunks: Iterable[str], tokenizer, max_chars: int = MAX_INPUT_CHARS,
+                  max_tokens: int = MAX_MODEL_TOKENS) -> PreparedInput:
+    """Normalize the input once and tokenize the result once for the model."""
+    text = normalize_chunks(chunks, max_chars)
+    encoding = tokenizer(text, truncation=True, max_length=max_tokens, return_tensors="pt")
+    return PreparedInput(text=text, encoding=encoding)
+
+
+def iter_pdf_pages(reader) -> Iterable[str]:
+    """Yield page texts joined by a single space, extracting pages only on demand."""
+    for i, page in enumerate(reader.pages):
+        if i:
+            yield " "
+        yield page.extract_text() or ""
+
+
+def random_splits(text: str, count: int, rng: random.Random) -> List[List[str]]:
+    """The text whole, one chunk per character, and `count` random chunkings."""
+    splits = [[text], list(text)]
+    for _ in range(count):
+        cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(1, 32))))
+        splits.append([text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])])
+    return splits
+
+
+if __name__ == "__main__":
+    # Regression check: python api/preprocessing.py [file1.txt file2.txt ...]
+    # Defaults to the files in CORPUS_DIR. Each file is also fed in random
+    # chunks, since state carried across chunk boundaries is where
+    # normalize_chunks can drift from clean_text.
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(CORPUS_DIR, "*.txt")))
+    rng = random.Random(0)
+    failures = 0
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace", newline="") as f:
+            raw = f.read()
+        expected = clean_text(raw)[:MAX_INPUT_CHARS]
+        splits = random_splits(raw, 200, rng)
+        mismatches = sum(normalize_chunks(chunks) != expected for chunks in splits)
+        if mismatches:
+            failures += 1
+            print(f"MISMATCH: {path} ({mismatches}/{len(splits)} chunkings)")
+    print(f"{len(paths) - failures}/{len(paths)} files match clean_text")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,204 @@
+# --- rescore.py ---
+"""Re-score stored predictions with another model and compare it with the original.
+
+Usage (from the project root):
+    python -m api.rescore --model <huggingface-model> [--chunk-size 512] [--batch-size 16]
+        [--workers 2] [--checkpoint rescore.ckpt] [--report rescore_report.json]
+
+Predictions are streamed from DATABASE_URL in keyset-paginated chunks, scored in
+length-bucketed batches and written to `prediction_rescores`. After each chunk
+the last prediction id is saved to the checkpoint file, so an interrupted run
+resumes where it stopped; the file is removed once a run completes, and
+predictions already scored by the model are always skipped. Memory is bounded by one chunk plus the report arrays
+(3 bytes per re-scored prediction).
+"""
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import ast
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from Database.connection import engine
+from Database.models import Document, Feedback, Prediction, PredictionRescore
+from api.documents import decompress_body
+from api.inference import DEFAULT_PROFILE_PATH, MODEL_NAME, apply_thread_settings, classify_texts, load_classifier, load_profile
+
+# Label codes used by the report arrays; anything else is -1.
+LABEL_CODES = {"real": 0, "fake": 1}
+
+
+def label_code(label: Optional[str]) -> int:
+    return LABEL_CODES.get((label or "").lower(), -1)
+
+
+def stored_label(output_data: Optional[str]) -> Optional[str]:
+    """Label from a stored output_data string such as "[{'label': 'Real', 'score': ...}]"."""
+    try:
+        data = ast.literal_eval(output_data or "")
+    except (ValueError, SyntaxError):
+        return None
+    if isinstance(data, list) and data:
+        data = data[0]
+    return data.get("label") if isinstance(data, dict) else None
+
+
+def read_checkpoint(path: str) -> Optional[UUID]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        last_id = f.read().strip()
+    return UUID(last_id) if last_id else None
+
+
+def write_checkpoint(path: str, last_id: str) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(last_id)
+    os.replace(tmp, path)
+
+
+def iter_keyset(conn, query, key, chunk_size: int, after=None) -> Iterator[List[Any]]:
+    """Yield successive chunks of `query` ordered by `key`, starting after `after`."""
+    while True:
+        page = query.order_by(key).limit(chunk_size)
+        if after is not None:
+            page = page.where(key > after)
+        rows = conn.execute(page).fetchall()
+        if not rows:
+            return
+        yield rows
+        after = rows[-1][0]
+
+
+def rescore(model_name: str, chunk_size: int, batch_size: int, workers: int, checkpoint: str) -> int:
+    """Score every prediction not yet re-scored by `model_name`; returns the number scored."""
+    tokenizer, model = load_classifier(model_name)
+    already_scored = exists().where(and_(
+        PredictionRescore.prediction_id == Prediction.id,
+        PredictionRescore.model_name == model_name,
+    ))
+    query = (
+        select(Prediction.id, Document.body)
+        .join(Document, Prediction.document_id == Document.id)
+        .where(~already_scored)
+    )
+
+    scored = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor, engine.connect() as conn:
+        for rows in iter_keyset(conn, query, Prediction.id, chunk_size, read_checkpoint(checkpoint)):
+            texts = [decompress_body(row.body) for row in rows]
+            results = classify_texts(tokenizer, model, texts, batch_size, executor)
+            now = datetime.utcnow()
+            conn.execute(
+                insert(PredictionRescore.__table__)
+                .values([
+                    {"prediction_id": row.id, "model_name": model_name,
+                     "label": result["label"], "score": result["score"], "created_at": now}
+                    for row, result in zip(rows, results)
+                ])
+                .on_conflict_do_nothing()
+            )
+            conn.commit()
+            write_checkpoint(checkpoint, str(rows[-1].id))
+            scored += len(rows)
+            print(f"Re-scored {scored} predictions (last id {rows[-1].id})")
+
+        # Ids are random UUIDs, so a cursor left behind would hide predictions
+        # inserted later with smaller ids; the NOT EXISTS filter covers reruns.
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        remaining = conn.execute(
+            select(func.count()).select_from(Prediction)
+            .join(Document, Prediction.document_id == Document.id)
+            .where(~already_scored)
+        ).scalar_one()
+    print(f"Done: {scored} re-scored in this run, {remaining} predictions still unscored by {model_name}")
+    return scored
+
+
+def collect_labels(model_name: str, chunk_size: int):
+    """Stored label, new label and feedback (-1 none, 0 incorrect, 1 correct) per re-scored prediction."""
+    query = (
+        select(Prediction.id, Prediction.output_data, PredictionRescore.label)
+        .join(PredictionRescore, PredictionRescore.prediction_id == Prediction.id)
+        .where(PredictionRescore.model_name == model_name)
+    )
+    old, new, feedback = [], [], []
+    with engine.connect() as conn:
+        for rows in iter_keyset(conn, query, Prediction.id, chunk_size):
+            ids = [row.id for row in rows]
+            feedback_res = conn.execute(
+                select(Feedback.prediction_id, Feedback.is_correct).where(Feedback.prediction_id.in_(ids))
+            )
+            feedbacks_map = {f.prediction_id: f.is_correct for f in feedback_res}
+            old.append(np.fromiter((label_code(stored_label(r.output_data)) for r in rows), np.int8, len(rows)))
+            new.append(np.fromiter((label_code(r.label) for r in rows), np.int8, len(rows)))
+            feedback.append(np.fromiter(
+                (-1 if feedbacks_map.get(i) is None else int(feedbacks_map[i]) for i in ids), np.int8, len(rows)
+            ))
+    if not old:
+        return (np.empty(0, np.int8),) * 3
+    return np.concatenate(old), np.concatenate(new), np.concatenate(feedback)
+
+
+def build_report(old: np.ndarray, new: np.ndarray, feedback: np.ndarray) -> Dict[str, Any]:
+    """Agreement between the two models and accuracy of each against user feedback."""
+    both = (old >= 0) & (new >= 0)
+    # Feedback says whether the stored label was right; for two labels that gives the truth.
+    judged = (feedback >= 0) & (old >= 0)
+    truth = np.where(feedback == 1, old, 1 - old)
+    confusion = np.bincount(old[both] * 2 + new[both], minlength=4).reshape(2, 2)
+    return {
+        "rescored": int(old.size),
+        "comparable": int(both.sum()),
+        "agreement": float((old[both] == new[both]).mean()) if both.any() else None,
+        "flipped_real_to_fake": int(confusion[0, 1]),
+        "flipped_fake_to_real": int(confusion[1, 0]),
+        "with_feedback": int(judged.sum()),
+        "old_accuracy": float((feedback[judged] == 1).mean()) if judged.any() else None,
+        "new_accuracy": float((new[judged] == truth[judged]).mean()) if judged.any() else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-score stored predictions with a new model.")
+    parser.add_argument("--model", required=True, help="Hugging Face model to score with")
+    parser.add_argument("--chunk-size", type=int, default=512, help="predictions read per database query")
+    parser.add_argument("--batch-size", type=int, default=None, help="texts per forward pass (default: tuned profile, else 16)")
+    parser.add_argument("--workers", type=int, default=1, help="concurrent inference batches")
+    parser.add_argument("--checkpoint", default=None, help="resume file (default: rescore_<model>.ckpt)")
+    parser.add_argument("--report", default=None, help="also write the report as JSON to this path")
+    parser.add_argument("--report-only", action="store_true", help="skip scoring, only build the report")
+    parser.add_argument("--profile", default=os.getenv("INFERENCE_PROFILE", DEFAULT_PROFILE_PATH),
+                        help="tuned settings written by api.autotune")
+    args = parser.parse_args()
+
+    # Batch settings tuned for this command, not the API's one-text-per-pass ones
+    profile = load_profile(args.profile).get("rescore", {})
+    apply_thread_settings(profile)
+    batch_size = args.batch_size or profile.get("batch_size", 16)
+
+    checkpoint = args.checkpoint or f"rescore_{args.model.replace('/', '_')}.ckpt"
+    if not args.report_only:
+        rescore(args.model, args.chunk_size, batch_size, args.workers, checkpoint)
+
+    report = {"model": args.model, "baseline_model": MODEL_NAME,
+              **build_report(*collect_labels(args.model, args.chunk_size))}
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# --- responses.py ---
+from typing import Any
+import gzip
+import json
+import os
+
+from fastapi import Request, Response
+
+# Optional accelerators: orjson for encoding, brotli for compression.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; compressing them costs more than it saves.
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def accepted_encodings(request: Request) -> set:
+    """Content codings the client accepts; those with q=0 (or an unreadable q) are refused.
+
+    A `*` entry stands for every coding the header does not list by name.
+    """
+    qvalues = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, *params = part.split(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qvalues[name] = q
+    accepted = {name for name, q in qvalues.items() if q > 0}
+    if "*" in accepted:
+        accepted |= {name for name in ("br", "gzip") if name not in qvalues}
+    return accepted
+
+
+def compress(body: bytes, encodings: set, min_size: int = COMPRESSION_MIN_SIZE):
+    """Return (body, content-encoding or None), preferring brotli over gzip."""
+    if len(body) < min_size:
+        return body, None
+    if brotli is not None and "br" in encodings:
+        return brotli.compress(body, quality=4), "br"
+    if "gzip" in encodings:
+        return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
+
+
+def fast_json_response(request: Request, content: Any) -> Response:
+    """Serialize rows already shaped like the response model, skipping Pydantic re-validation.
+
+    FastAPI returns a Response instance as-is, so the endpoint's response_model is
+    only used for the OpenAPI schema. Callers must select exactly the model's fields.
+    """
+    body, encoding = compress(dumps(content), accepted_encodings(request))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,100 @@
+# --- schemas.py ---
+from pydantic import BaseModel, Field, EmailStr, field_validator
+from typing import Optional, Dict, Any
+from uuid import UUID
+from datetime import datetime
+import ast
+
+# Columns of UserAdminView, selected explicitly so list endpoints never expose other app_users fields
+USER_ADMIN_COLUMNS = "id, email, username, role, created_at"
+
+
+def parse_output_data(v: Any) -> Any:
+    """Turn a stored output_data string like "[{'label': ..., 'score': ...}]" into a dict."""
+    if isinstance(v, str):
+        try:
+            # Safely evaluate the string representation of the list/dict
+            data = ast.literal_eval(v)
+            # The model expects a dict, but pipeline returns a list with one dict
+            if isinstance(data, list) and len(data) > 0:
+                return data[0]
+            return data
+        except (ValueError, SyntaxError):
+            # Return an empty dict if it's not a valid literal
+            return {}
+    return v
+
+def normalize_timestamp(v: Any) -> Any:
+    """Write a PostgREST UTC timestamp ("...+00:00") the way Pydantic serializes it ("...Z")."""
+    if isinstance(v, str) and v.endswith("+00:00"):
+        return v[:-6] + "Z"
+    return v
+
+# --- Pydantic Models ---
+
+class AuthRequest(BaseModel):
+    email: EmailStr
+    password: str = Field(..., min_length=6)
+    username: Optional[str] = None
+
+class SignInRequest(BaseModel):
+    email: EmailStr
+    password: str
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+    role: str
+
+class AccuracyResponse(BaseModel):
+    accuracy: float
+
+class PredictionRequest(BaseModel):
+    input_text: str
+
+class FeedbackCreate(BaseModel):
+    prediction_id: UUID
+    is_correct: bool
+    comment: Optional[str] = None
+
+class AppUser(BaseModel):
+    id: UUID
+    username: Optional[str] = None
+    email: EmailStr
+    role: str
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+# Base class for prediction fields to handle data transformation from DB
+class PredictionBase(BaseModel):
+    id: UUID
+    user_id: UUID
+    document_id: Optional[str] = None
+    input_data: Optional[str] = None  # Body of the referenced document, only when requested
+    output_data: Dict[str, Any]
+    created_at: Optional[datetime] = None # Make optional to handle potential nulls from DB
+    model_name: Optional[str] = None
+
+    @field_validator('output_data', mode='before')
+    @classmethod
+    def parse_output_data(cls, v: Any) -> Any:
+        return parse_output_data(v)
+
+class Prediction(PredictionBase):
+    feedback_is_correct: Optional[bool] = None
+    feedback_created_at: Optional[datetime] = None
+    feedback_comment: Optional[str] = None
+
+class PredictionInput(BaseModel):
+    id: UUID
+    input_data: Optional[str] = None
+
+class UserAdminView(BaseModel):
+    id: UUID
+    email: EmailStr
+    username: Optional[str]
+    role: str
+    created_at: datetime
+
+class PredictionAdminView(PredictionBase):
+    user_email: Optional[EmailStr] = None
@@ -16,23 +16,27 @@ interface TrendItem {
   id: string;
   user_id: string;
   user_email: string | null;
-  input_data: string;
+  input_data: string | null;
   output_data: { label: string; score: number };
   created_at: string;
   model_name: string | null;
 }
 
+// Latest predictions shown, each with a text preview of PREVIEW_CHARS characters
+const TRENDS_LIMIT = 50;
+const PREVIEW_CHARS = 150;
+
 const Trends: React.FC = () => {
   const { data = [], isLoading, isError } = useQuery<TrendItem[], Error>({
     queryKey: ['trendsData'],
     queryFn: async () => {
       try {
-        const res = await api.get<TrendItem[]>('/admin/predictions');
+        const res = await api.get<TrendItem[]>('/admin/predictions', { params: { preview_chars: PREVIEW_CHARS, limit: TRENDS_LIMIT } });
         return res.data;
       } catch (err: any) {
         if (err.response?.status === 403) {
           // Not admin: fallback to user's own predictions
-          const res = await api.get<TrendItem[]>('/predictions/me');
+          const res = await api.get<TrendItem[]>('/predictions/me', { params: { preview_chars: PREVIEW_CHARS, limit: TRENDS_LIMIT } });
           return res.data;
         }
         throw err;
@@ -70,7 +74,7 @@ const Trends: React.FC = () => {
                 secondary={
                   <>
                     <Typography variant="body2" color="text.secondary">
-                      {(item.input_data || '').slice(0, 150)}...
+                      {(item.input_data || '').slice(0, PREVIEW_CHARS)}...
                     </Typography>
                     <Typography variant="caption" component="div" sx={{ mt: 1 }}>
                       {item.output_data && item.output_data.label ? (
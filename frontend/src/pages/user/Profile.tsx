@@ -37,7 +37,7 @@ interface User {
 
 interface Prediction {
   id: string;
-  input_data: string;
+  input_data: string | null;
   output_data: {
     label?: string;
     score?: number;
@@ -51,6 +51,11 @@ interface Prediction {
   feedback_comment?: string | null;
 }
 
+interface PredictionInput {
+  id: string;
+  input_data: string | null;
+}
+
 interface PasswordForm {
   oldPassword: string;
   newPassword: string;
@@ -89,6 +94,26 @@ const StatCard: React.FC<StatCardProps> = ({ title, value, icon, color }) => (
   </Card>
 );
 
+// Full input text of a prediction, fetched only when its details are opened
+const PredictionText: React.FC<{ predictionId: string }> = ({ predictionId }) => {
+  const { data, isLoading, isError } = useQuery<PredictionInput>({
+    queryKey: ['predictionInput', predictionId],
+    queryFn: async () => {
+      const response = await api.get(`/predictions/${predictionId}/input`);
+      return response.data;
+    },
+    staleTime: Infinity, // A prediction's text never changes
+  });
+
+  if (isLoading) {
+    return <CircularProgress size={16} />;
+  }
+  if (isError) {
+    return <>Metin yüklenemedi.</>;
+  }
+  return <>{data?.input_data || ''}</>;
+};
+
 // Format date to a readable format
 const formatDate = (dateString?: string | Date): string => {
   if (!dateString) return 'N/A';
@@ -131,7 +156,8 @@ const Profile: React.FC = () => {
   const { data: predictions = [], isLoading: arePredictionsLoading, error: predictionsError } = useQuery<Prediction[]>({
     queryKey: ['userPredictions'],
     queryFn: async () => {
-      const response = await api.get('/predictions/me');
+      // Only a short preview per row; the full text is loaded when a prediction is opened
+      const response = await api.get('/predictions/me', { params: { preview_chars: 50 } });
       return response.data;
     },
     enabled: !!user, // Only run if user is fetched
@@ -340,7 +366,7 @@ const Profile: React.FC = () => {
                             </Grid>
                             <Grid item xs={4}>
                               <Typography variant="body2" noWrap>
-                                {prediction.input_data.substring(0, 50)}...
+                                {(prediction.input_data || '').substring(0, 50)}...
                               </Typography>
                               <Typography variant="caption" color="text.secondary">
                                 {prediction.model_name || 'Bilinmeyen Model'}
@@ -381,7 +407,7 @@ const Profile: React.FC = () => {
                           <CardContent>
                             <Typography variant="h6">Tahmin Detayları</Typography>
                             <Typography variant="body2" sx={{ mt: 2, mb: 2, whiteSpace: 'pre-wrap', wordBreak: 'break-word' }}>
-                              <strong>Metin:</strong> {prediction.input_data}
+                              <strong>Metin:</strong> <PredictionText predictionId={prediction.id} />
                             </Typography>
                             <Grid container spacing={2} sx={{ mb: 2 }}>
                                 <Grid item xs={6}>